@@ -6,6 +6,7 @@ import json
 import requests
 from datetime import datetime
 import logging
+import msgpack
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +18,10 @@ load_dotenv()
 # Initialize OpenAI client
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Ask the services for MessagePack; they fall back to JSON otherwise
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+SERVICE_HEADERS = {"Accept": f"{MSGPACK_MEDIA_TYPE}, application/json"}
+
 # Initialize session state for tracking if results are shown
 if 'show_results' not in st.session_state:
     st.session_state.show_results = False
@@ -26,21 +31,29 @@ def reset_page():
     st.session_state.show_results = False
     st.rerun()
 
-def get_weather_data(city, start_date, end_date):
+def decode_response(response):
+    """Decode a service response according to its Content-Type"""
+    if response.headers.get("Content-Type", "").startswith(MSGPACK_MEDIA_TYPE):
+        return msgpack.unpackb(response.content, raw=False)
+    return response.json()
+
+def get_weather_data(city, start_date, end_date, resolution="daily"):
     try:
         logger.info(f"Requesting weather data for city: {city} from {start_date} to {end_date}")
         # Make request to weather service
         response = requests.post(
             "http://weather_service:8000/weather",
+            headers=SERVICE_HEADERS,
             json={
                 "city": city,
                 "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat()
+                "end_date": end_date.isoformat(),
+                "resolution": resolution
             }
         )
         if response.status_code == 200:
-            weather_data = response.json()
-            logger.info(f"Successfully received weather data: {weather_data}")
+            weather_data = decode_response(response)
+            logger.info(f"Successfully received weather data: {len(weather_data.get('forecast', []))} days, {response.headers.get('Content-Length', 'unknown')} bytes on the wire")
             return weather_data
         else:
             logger.error(f"Failed to fetch weather data. Status code: {response.status_code}")
@@ -61,6 +74,7 @@ def get_flight_data(origin_city, origin_iata, destination_city, destination_iata
         # Make request to flight service
         response = requests.post(
             "http://flight_service:8001/flights",
+            headers=SERVICE_HEADERS,
             json={
                 "origin_iata": origin_iata,
                 "destination_iata": destination_iata,
@@ -68,8 +82,8 @@ def get_flight_data(origin_city, origin_iata, destination_city, destination_iata
             }
         )
         if response.status_code == 200:
-            flight_data = response.json()
-            logger.info(f"Successfully received flight data: {flight_data}")
+            flight_data = decode_response(response)
+            logger.info(f"Successfully received flight data: {len(flight_data.get('flights', []))} offers, {response.headers.get('Content-Length', 'unknown')} bytes on the wire")
             return flight_data
         else:
             logger.error(f"Failed to fetch flight data. Status code: {response.status_code}")
@@ -265,6 +279,10 @@ with st.sidebar:
     start_date = st.date_input("Start Date")
     end_date = st.date_input("End Date")
     preferences = st.text_area("Preferences (e.g., budget, interests, dietary restrictions)")
+    fast_weather = st.checkbox(
+        "Fast weather estimate for long trips",
+        help="Sample a subset of days for long trips and estimate the others"
+    )
     
     if st.button("Generate Travel Plan"):
         if (destination and destination_iata and departure_city and departure_iata 
@@ -274,12 +292,15 @@ with st.sidebar:
             with st.spinner("Generating your personalized travel plan..."):
                 # Get weather and flight data
                 logger.info("Fetching weather data...")
-                weather_data = get_weather_data(destination, start_date, end_date)
-                logger.info(f"Weather data received: {weather_data}")
+                weather_data = get_weather_data(
+                    destination,
+                    start_date,
+                    end_date,
+                    "adaptive" if fast_weather else "daily"
+                )
                 
                 logger.info("Fetching flight data...")
                 flight_data = get_flight_data(departure_city, departure_iata, destination, destination_iata, start_date)
-                logger.info(f"Flight data received: {flight_data}")
                 
                 # Generate travel plan with weather summary and flight data
                 logger.info("Generating travel plan with OpenAI...")
@@ -343,6 +364,13 @@ if st.session_state.show_results:
             for condition in st.session_state.weather_data['summary']['most_common_conditions']:
                 st.markdown(f"- {condition['condition']} ({condition['days']} days)")
             
+            estimation = st.session_state.weather_data['summary'].get('estimation')
+            if estimation:
+                st.markdown(f"Measured {estimation['measured_days']} days, estimated {estimation['estimated_days']} days")
+                if estimation['average_error']:
+                    st.markdown(f"Averages include estimated days (error: {estimation['average_error']['temperature']}, {estimation['average_error']['humidity']}, {estimation['average_error']['wind_speed']})")
+                st.markdown("Ranges and most common conditions are based on measured days only")
+            
             if "note" in st.session_state.weather_data:
                 st.markdown(f'<div class="weather-note">{st.session_state.weather_data["note"]}</div>', unsafe_allow_html=True)
             
@@ -353,13 +381,16 @@ if st.session_state.show_results:
             st.markdown("### Daily Weather Details")
             forecast_data = []
             for day in st.session_state.weather_data["forecast"]:
-                forecast_data.append({
+                row = {
                     "Date": day["date"],
                     "Temperature": day["temperature"],
                     "Conditions": day["conditions"],
                     "Humidity": day["humidity"],
                     "Wind Speed": day["wind_speed"]
-                })
+                }
+                if "source" in day:
+                    row["Source"] = day["source"]
+                forecast_data.append(row)
             st.table(forecast_data)
         else:
             st.warning("Weather forecast data is not available")
@@ -0,0 +1,87 @@
+import json
+import gzip
+import timeit
+from datetime import date, timedelta
+import msgpack
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+# Number of encode/decode rounds per measurement
+ROUNDS = 200
+
+def sample_weather_payload(days):
+    """Build a /weather response shaped like the weather service output"""
+    start = date(2024, 6, 1)
+    forecast = [{
+        'date': (start + timedelta(days=i)).isoformat(),
+        'temperature': f"{20 + i % 7:.1f}°C",
+        'conditions': "scattered clouds" if i % 3 else "clear sky",
+        'humidity': f"{55 + i % 20}%",
+        'wind_speed': f"{3.1 + i % 5} m/s"
+    } for i in range(days)]
+    return {
+        'city': "Lisbon",
+        'forecast': forecast,
+        'summary': {
+            'temperature': {'average': "23.0°C", 'min': "20.0°C", 'max': "26.0°C"},
+            'humidity': {'average': "64.5%", 'min': "55.0%", 'max': "74.0%"},
+            'wind_speed': {'average': "5.1 m/s", 'min': "3.1 m/s", 'max': "7.1 m/s"},
+            'most_common_conditions': [
+                {'condition': "scattered clouds", 'days': days - days // 3},
+                {'condition': "clear sky", 'days': days // 3}
+            ],
+            'total_days': days
+        },
+        'timestamp': "2024-05-01T12:00:00",
+        'note': "This data represents the weather conditions from the same period last year"
+    }
+
+def sample_flight_payload(offers):
+    """Build a /flights response shaped like the flight service output"""
+    segment = {
+        "departure": {"airport": "CDG", "time": "2024-06-01T07:15:00"},
+        "arrival": {"airport": "LIS", "time": "2024-06-01T09:00:00"},
+        "carrier": "TP",
+        "flight_number": "433"
+    }
+    return {
+        "status": "success",
+        "flights": [{
+            "price": {"total": f"{150 + i * 12}.40", "currency": "EUR"},
+            "itineraries": [{"segments": [segment, segment]}]
+        } for i in range(offers)]
+    }
+
+def measure(payload):
+    """Return encode/decode time (ms per round) and payload size for each wire format"""
+    # JSON is encoded the way the services send it by default
+    encode_json = lambda: JSONResponse(jsonable_encoder(payload)).body
+    json_body = encode_json()
+    msgpack_body = msgpack.packb(payload, use_bin_type=True)
+    formats = {
+        'json': (encode_json, lambda: json.loads(json_body), json_body),
+        'msgpack': (lambda: msgpack.packb(payload, use_bin_type=True),
+                    lambda: msgpack.unpackb(msgpack_body, raw=False), msgpack_body),
+    }
+    results = {}
+    for name, (encode, decode, body) in formats.items():
+        results[name] = {
+            'encode_ms': timeit.timeit(encode, number=ROUNDS) * 1000 / ROUNDS,
+            'decode_ms': timeit.timeit(decode, number=ROUNDS) * 1000 / ROUNDS,
+            'bytes': len(body),
+            'gzip_bytes': len(gzip.compress(body))
+        }
+    return results
+
+def report(label, results):
+    baseline = results['json']
+    print(f"\n{label}")
+    print(f"{'format':<10}{'encode ms':>12}{'decode ms':>12}{'bytes':>10}{'gzip bytes':>12}{'size vs json':>14}")
+    for name, r in results.items():
+        ratio = r['bytes'] / baseline['bytes']
+        print(f"{name:<10}{r['encode_ms']:>12.3f}{r['decode_ms']:>12.3f}{r['bytes']:>10}{r['gzip_bytes']:>12}{ratio:>13.0%}")
+
+if __name__ == "__main__":
+    for days in (7, 30, 60):
+        report(f"/weather, {days} days", measure(sample_weather_payload(days)))
+    report("/flights, 5 offers", measure(sample_flight_payload(5)))
@@ -1,10 +1,14 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 from datetime import datetime
 from amadeus import Client, ResponseError
 import os
 from dotenv import load_dotenv
 import logging
+import msgpack
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +19,11 @@ load_dotenv()
 
 app = FastAPI()
 
+# Compress large responses for clients that send Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
 # Initialize Amadeus client
 amadeus = Client(
     client_id=os.getenv("AMADEUS_API_KEY"),
@@ -26,8 +35,34 @@ class FlightRequest(BaseModel):
     destination_iata: str
     departure_date: str
 
+def accepts_msgpack(accept):
+    """Check whether the Accept header lists MessagePack without refusing it (q=0)"""
+    if not accept:
+        return False
+    for entry in accept.split(","):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        if media_type.lower() != MSGPACK_MEDIA_TYPE:
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+def encode_response(payload, accept):
+    """Encode the payload as MessagePack if the client accepts it, otherwise fall back to JSON"""
+    # The body depends on Accept, so caches must key on it
+    headers = {"Vary": "Accept"}
+    if accepts_msgpack(accept):
+        return Response(content=msgpack.packb(payload, use_bin_type=True), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return JSONResponse(content=jsonable_encoder(payload), headers=headers)
+
 @app.post("/flights")
-async def get_flights(request: FlightRequest):
+async def get_flights(request: FlightRequest, accept: str = Header(None)):
     try:
         logger.info(f"Searching flights from {request.origin_iata} to {request.destination_iata} on {request.departure_date}")
         
@@ -72,10 +107,10 @@ async def get_flights(request: FlightRequest):
             
             flights.append(flight)
 
-        return {
+        return encode_response({
             "status": "success",
             "flights": flights
-        }
+        }, accept)
 
     except ResponseError as error:
         logger.error(f"Amadeus API error: {error}")
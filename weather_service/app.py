@@ -1,5 +1,8 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import requests
 from datetime import datetime, timedelta
 import os
@@ -8,6 +11,10 @@ from pydantic import BaseModel
 import logging
 from collections import Counter
 from statistics import mean
+from bisect import bisect_left
+from typing import Literal
+import math
+import msgpack
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,10 +34,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses for clients that send Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Adaptive resolution: ranges longer than the threshold are sampled with at most
+# SAMPLING_MAX_CALLS upstream calls (first and last day included), the remaining
+# days are interpolated. At least two calls are needed to cover both ends.
+SAMPLING_THRESHOLD_DAYS = int(os.getenv("WEATHER_SAMPLING_THRESHOLD_DAYS", "14"))
+SAMPLING_MAX_CALLS = max(2, int(os.getenv("WEATHER_SAMPLING_MAX_CALLS", "10")))
+NUMERIC_READINGS = ('temp', 'humidity', 'wind_speed')
+
 class WeatherRequest(BaseModel):
     city: str
     start_date: str
     end_date: str
+    resolution: Literal["daily", "adaptive"] = "daily"
 
 def get_coordinates(city, api_key):
     """Get coordinates for a city using OpenWeather Geocoding API"""
@@ -50,34 +70,126 @@ def get_historical_weather(lat, lon, api_key, date):
         return response.json()
     return None
 
+def read_day(data):
+    """Extract the readings used by the service from a timemachine response"""
+    # Use the first data point of the day (usually midnight)
+    day_data = data['data'][0]
+    return {
+        'temp': day_data['temp'],
+        'conditions': day_data['weather'][0]['description'],
+        'humidity': day_data['humidity'],
+        'wind_speed': day_data['wind_speed']
+    }
+
+def format_forecast_day(date, reading):
+    """Format a day's readings as a forecast entry"""
+    return {
+        'date': date.date().isoformat(),
+        'temperature': f"{reading['temp']:.1f}°C",
+        'conditions': reading['conditions'],
+        'humidity': f"{reading['humidity']}%",
+        'wind_speed': f"{reading['wind_speed']} m/s"
+    }
+
+def sample_dates(start_date, end_date, stride):
+    """Pick every stride-th day of the period, always keeping the last day"""
+    dates = []
+    current_date = start_date
+    while current_date <= end_date:
+        dates.append(current_date)
+        current_date += timedelta(days=stride)
+    if dates[-1] != end_date:
+        dates.append(end_date)
+    return dates
+
+def interpolate(date, before, after, key):
+    """Linearly interpolate a numeric reading between two measured days"""
+    (before_date, before_reading), (after_date, after_reading) = before, after
+    weight = (date - before_date).days / (after_date - before_date).days
+    return before_reading[key] + (after_reading[key] - before_reading[key]) * weight
+
+def fill_forecast(start_date, end_date, measured):
+    """Build a day-by-day forecast from measured days, estimating the days in between"""
+    measured_dates = [date for date, _ in measured]
+    forecast = []
+    current_date = start_date
+    while current_date <= end_date:
+        index = bisect_left(measured_dates, current_date)
+        if index < len(measured) and measured_dates[index] == current_date:
+            day = format_forecast_day(current_date, measured[index][1])
+            day['source'] = 'measured'
+        else:
+            if index == 0 or index == len(measured):
+                # Outside the measured days: hold the nearest measured reading
+                reading = dict(measured[min(index, len(measured) - 1)][1])
+            else:
+                before, after = measured[index - 1], measured[index]
+                reading = {key: interpolate(current_date, before, after, key) for key in NUMERIC_READINGS}
+                nearest = before if current_date - before[0] <= after[0] - current_date else after
+                reading['conditions'] = nearest[1]['conditions']
+            reading['humidity'] = round(reading['humidity'])
+            reading['wind_speed'] = round(reading['wind_speed'], 2)
+            day = format_forecast_day(current_date, reading)
+            day['source'] = 'estimated'
+        forecast.append(day)
+        current_date += timedelta(days=1)
+    return forecast
+
+def estimate_interpolation_error(measured):
+    """Mean absolute error of the interpolation, by leaving out each interior measured day"""
+    # The left-out day is interpolated over twice the sampling stride, so this
+    # overestimates the error of the days actually estimated
+    if len(measured) < 3:
+        return None
+    return {
+        key: mean(abs(interpolate(measured[i][0], measured[i - 1], measured[i + 1], key) - measured[i][1][key])
+                  for i in range(1, len(measured) - 1))
+        for key in NUMERIC_READINGS
+    }
+
+def format_errors(errors):
+    """Format interpolation errors with the units used in the summary"""
+    return {
+        'temperature': f"±{errors['temp']:.1f}°C",
+        'humidity': f"±{errors['humidity']:.1f}%",
+        'wind_speed': f"±{errors['wind_speed']:.1f} m/s"
+    }
+
 def generate_weather_summary(forecast_data):
     """Generate a summary of weather conditions for the period"""
     if not forecast_data:
         return None
     
+    # Interpolated days never exceed the measured extremes and only copy
+    # conditions, so ranges and condition counts use measured days only
+    measured_data = [day for day in forecast_data if day.get('source') != 'estimated']
+    
     # Extract numerical values from forecast data
     temperatures = [float(day['temperature'].replace('°C', '')) for day in forecast_data]
     humidities = [float(day['humidity'].replace('%', '')) for day in forecast_data]
     wind_speeds = [float(day['wind_speed'].replace(' m/s', '')) for day in forecast_data]
-    conditions = [day['conditions'] for day in forecast_data]
+    measured_temperatures = [float(day['temperature'].replace('°C', '')) for day in measured_data]
+    measured_humidities = [float(day['humidity'].replace('%', '')) for day in measured_data]
+    measured_wind_speeds = [float(day['wind_speed'].replace(' m/s', '')) for day in measured_data]
+    conditions = [day['conditions'] for day in measured_data]
     
     # Calculate statistics
     temp_stats = {
         'average': f"{mean(temperatures):.1f}°C",
-        'min': f"{min(temperatures):.1f}°C",
-        'max': f"{max(temperatures):.1f}°C"
+        'min': f"{min(measured_temperatures):.1f}°C",
+        'max': f"{max(measured_temperatures):.1f}°C"
     }
     
     humidity_stats = {
         'average': f"{mean(humidities):.1f}%",
-        'min': f"{min(humidities):.1f}%",
-        'max': f"{max(humidities):.1f}%"
+        'min': f"{min(measured_humidities):.1f}%",
+        'max': f"{max(measured_humidities):.1f}%"
     }
     
     wind_stats = {
         'average': f"{mean(wind_speeds):.1f} m/s",
-        'min': f"{min(wind_speeds):.1f} m/s",
-        'max': f"{max(wind_speeds):.1f} m/s"
+        'min': f"{min(measured_wind_speeds):.1f} m/s",
+        'max': f"{max(measured_wind_speeds):.1f} m/s"
     }
     
     # Get most common weather conditions
@@ -92,13 +204,39 @@ def generate_weather_summary(forecast_data):
         'total_days': len(forecast_data)
     }
 
+def accepts_msgpack(accept):
+    """Check whether the Accept header lists MessagePack without refusing it (q=0)"""
+    if not accept:
+        return False
+    for entry in accept.split(","):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        if media_type.lower() != MSGPACK_MEDIA_TYPE:
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+def encode_response(payload, accept):
+    """Encode the payload as MessagePack if the client accepts it, otherwise fall back to JSON"""
+    # The body depends on Accept, so caches must key on it
+    headers = {"Vary": "Accept"}
+    if accepts_msgpack(accept):
+        return Response(content=msgpack.packb(payload, use_bin_type=True), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return JSONResponse(content=jsonable_encoder(payload), headers=headers)
+
 @app.get("/")
 async def root():
     logger.info("Root endpoint accessed")
     return {"message": "Weather Service is running"}
 
 @app.post("/weather")
-async def get_weather(request: WeatherRequest):
+async def get_weather(request: WeatherRequest, accept: str = Header(None)):
     try:
         logger.info(f"Weather request received for city: {request.city}")
         api_key = os.getenv("OPENWEATHER_API_KEY")
@@ -124,42 +262,60 @@ async def get_weather(request: WeatherRequest):
         
         # Get historical weather data
         processed_forecast = []
-        current_date = last_year_start
+        measured = []
+        total_days = (last_year_end - last_year_start).days + 1
+        adaptive = request.resolution == "adaptive" and total_days > SAMPLING_THRESHOLD_DAYS
         
-        while current_date <= last_year_end:
-            data = get_historical_weather(lat, lon, api_key, current_date)
-            if data and 'data' in data:
-                # Use the first data point of the day (usually midnight)
-                day_data = data['data'][0]
-                processed_forecast.append({
-                    'date': current_date.date().isoformat(),
-                    'temperature': f"{day_data['temp']:.1f}°C",
-                    'conditions': day_data['weather'][0]['description'],
-                    'humidity': f"{day_data['humidity']}%",
-                    'wind_speed': f"{day_data['wind_speed']} m/s"
-                })
-            current_date += timedelta(days=1)
+        if adaptive:
+            stride = max(1, math.ceil((total_days - 1) / (SAMPLING_MAX_CALLS - 1)))
+            logger.info(f"Sampling every {stride} days over {total_days} days")
+            for current_date in sample_dates(last_year_start, last_year_end, stride):
+                data = get_historical_weather(lat, lon, api_key, current_date)
+                if data and 'data' in data:
+                    measured.append((current_date, read_day(data)))
+            if measured:
+                processed_forecast = fill_forecast(last_year_start, last_year_end, measured)
+        else:
+            current_date = last_year_start
+            while current_date <= last_year_end:
+                data = get_historical_weather(lat, lon, api_key, current_date)
+                if data and 'data' in data:
+                    processed_forecast.append(format_forecast_day(current_date, read_day(data)))
+                current_date += timedelta(days=1)
         
         if not processed_forecast:
             logger.warning(f"No historical weather data available for the specified period")
-            return {
+            return encode_response({
                 'city': request.city,
                 'forecast': [],
                 'summary': None,
                 'error': "No historical weather data available for the specified period",
                 'timestamp': datetime.now().isoformat()
-            }
+            }, accept)
         
         # Generate weather summary
         weather_summary = generate_weather_summary(processed_forecast)
         
-        return {
+        if adaptive:
+            # Estimated days contribute their interpolation error to the averages
+            # in proportion to their share of the period
+            errors = estimate_interpolation_error(measured)
+            estimated_share = (total_days - len(measured)) / total_days
+            weather_summary['estimation'] = {
+                'measured_days': len(measured),
+                'estimated_days': total_days - len(measured),
+                'sampling_stride': stride,
+                'daily_error': format_errors(errors) if errors else None,
+                'average_error': format_errors({key: value * estimated_share for key, value in errors.items()}) if errors else None
+            }
+        
+        return encode_response({
             'city': request.city,
             'forecast': processed_forecast,
             'summary': weather_summary,
             'timestamp': datetime.now().isoformat(),
             'note': "This data represents the weather conditions from the same period last year"
-        }
+        }, accept)
     except Exception as e:
         logger.error(f"Error processing weather request: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))